@@ -708,6 +708,9 @@ def require_google_service(
 
         # Attach required scopes to the wrapper for tool filtering
         wrapper._required_google_scopes = _resolve_scopes(scopes)
+        wrapper._required_google_scopes_frozen = frozenset(
+            wrapper._required_google_scopes
+        )
 
         return wrapper
 
@@ -854,6 +857,7 @@ def require_multiple_services(service_configs: List[Dict[str, Any]]):
         for config in service_configs:
             all_scopes.extend(_resolve_scopes(config["scopes"]))
         wrapper._required_google_scopes = all_scopes
+        wrapper._required_google_scopes_frozen = frozenset(all_scopes)
 
         return wrapper
 
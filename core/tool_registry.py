@@ -6,7 +6,7 @@ based on tier configuration, replacing direct @server.tool() decorators.
 """
 
 import logging
-from typing import Set, Optional, Callable
+from typing import Set, Optional, Callable, FrozenSet, Iterable
 
 from auth.oauth_config import is_oauth21_enabled
 from auth.scopes import is_read_only_mode, get_all_read_only_scopes
@@ -14,16 +14,16 @@ from auth.scopes import is_read_only_mode, get_all_read_only_scopes
 logger = logging.getLogger(__name__)
 
 # Global registry of enabled tools
-_enabled_tools: Optional[Set[str]] = None
+_enabled_tools: Optional[FrozenSet[str]] = None
 
 
-def set_enabled_tools(tool_names: Optional[Set[str]]):
+def set_enabled_tools(tool_names: Optional[Iterable[str]]):
     """Set the globally enabled tools."""
     global _enabled_tools
-    _enabled_tools = tool_names
+    _enabled_tools = frozenset(tool_names) if tool_names is not None else None
 
 
-def get_enabled_tools() -> Optional[Set[str]]:
+def get_enabled_tools() -> Optional[FrozenSet[str]]:
     """Get the set of enabled tools, or None if all tools are enabled."""
     return _enabled_tools
 
@@ -47,15 +47,17 @@ def conditional_tool(server, tool_name: str):
         Either the registered tool decorator or a no-op decorator
     """
 
-    def decorator(func: Callable) -> Callable:
-        if is_tool_enabled(tool_name):
-            logger.debug(f"Registering tool: {tool_name}")
-            return server.tool()(func)
-        else:
-            logger.debug(f"Skipping tool registration: {tool_name}")
-            return func
+    enabled = _enabled_tools
+    if enabled is None or tool_name in enabled:
+        logger.debug(f"Registering tool: {tool_name}")
+        return server.tool()
 
-    return decorator
+    logger.debug(f"Skipping tool registration: {tool_name}")
+    return _noop_decorator
+
+
+def _noop_decorator(func: Callable) -> Callable:
+    return func
 
 
 def wrap_server_tool_method(server):
@@ -70,7 +72,7 @@ def wrap_server_tool_method(server):
 
         def wrapper_decorator(func: Callable) -> Callable:
             tool_name = func.__name__
-            server._tracked_tools.append(tool_name)
+            server._tracked_tools.append((tool_name, func))
             # Always apply the original decorator to register the tool
             return original_decorator(func)
 
@@ -82,14 +84,22 @@ def wrap_server_tool_method(server):
 def filter_server_tools(server):
     """Remove disabled tools from the server after registration.
 
-    Bridges sync callers to the async implementation.  When called from
-    inside a running event loop (e.g. module import under an ASGI server),
-    the coroutine is executed in a background thread with its own loop to
-    avoid "asyncio.run() cannot be called from a running event loop".
+    Only the FastMCP accessors are async, so they are awaited once up front
+    by ``_collect_tools_async`` and the filtering itself runs synchronously.
+    When called from inside a running event loop (e.g. module import under
+    an ASGI server), the collection coroutine is executed in a background
+    thread with its own loop to avoid "asyncio.run() cannot be called from a
+    running event loop".
     """
     import asyncio
     import threading
 
+    enabled_tools = _enabled_tools
+    oauth21_enabled = is_oauth21_enabled()
+    read_only_mode = is_read_only_mode()
+    if enabled_tools is None and not oauth21_enabled and not read_only_mode:
+        return
+
     try:
         asyncio.get_running_loop()
         is_loop_running = True
@@ -97,12 +107,13 @@ def filter_server_tools(server):
         is_loop_running = False
 
     if is_loop_running:
+        _result = None
         _exc = None
 
         def _run():
-            nonlocal _exc
+            nonlocal _result, _exc
             try:
-                asyncio.run(_filter_server_tools_async(server))
+                _result = asyncio.run(_collect_tools_async(server, read_only_mode))
             except Exception as e:
                 _exc = e
 
@@ -111,70 +122,103 @@ def filter_server_tools(server):
         t.join()
         if _exc:
             raise _exc
+        collected = _result
     else:
-        asyncio.run(_filter_server_tools_async(server))
+        collected = asyncio.run(_collect_tools_async(server, read_only_mode))
 
+    _apply_filter(server, collected, enabled_tools, oauth21_enabled, read_only_mode)
 
-async def _filter_server_tools_async(server):
-    """Async implementation of tool filtering using public FastMCP APIs."""
-    enabled_tools = get_enabled_tools()
-    oauth21_enabled = is_oauth21_enabled()
-    if enabled_tools is None and not oauth21_enabled:
-        return
 
-    tools_removed = 0
-    read_only_mode = is_read_only_mode()
-    allowed_scopes = set(get_all_read_only_scopes()) if read_only_mode else None
+async def _collect_tools_async(server, include_scopes: bool):
+    """
+    Fetch the registered tool names and, optionally, their required scopes.
 
-    tool_list = await server.list_tools()
-    tool_names = {t.name for t in tool_list}
-    tools_to_remove = set()
+    Scopes are read off the callables recorded by ``wrap_server_tool_method``;
+    ``server.get_tool()`` is only consulted for tools registered before the
+    wrapper was installed (e.g. ``start_google_auth``).
+
+    Returns:
+        A ``(tool_names, scopes_by_name)`` tuple mapping each tool name to a
+        frozenset of required scopes. ``scopes_by_name`` is empty unless
+        ``include_scopes`` is set.
+    """
+    import asyncio
 
-    # 1. Tier filtering
-    if enabled_tools is not None:
+    tool_list = await server.list_tools()
+    tool_names = [t.name for t in tool_list]
+    scopes_by_name = {}
+
+    if include_scopes:
+        func_by_name = dict(getattr(server, "_tracked_tools", ()))
+        untracked = [name for name in tool_names if name not in func_by_name]
+        if untracked:
+            tool_objs = await asyncio.gather(
+                *(server.get_tool(name) for name in untracked)
+            )
+            for name, tool_obj in zip(untracked, tool_objs):
+                func_by_name[name] = getattr(tool_obj, "fn", tool_obj)
         for tool_name in tool_names:
-            if not is_tool_enabled(tool_name):
-                tools_to_remove.add(tool_name)
+            func_to_check = func_by_name[tool_name]
+            required_scopes = getattr(
+                func_to_check, "_required_google_scopes_frozen", None
+            )
+            if required_scopes is None:
+                required_scopes = frozenset(
+                    getattr(func_to_check, "_required_google_scopes", ())
+                )
+            scopes_by_name[tool_name] = required_scopes
 
-    # 2. OAuth 2.1 filtering
-    if oauth21_enabled and "start_google_auth" in tool_names:
-        tools_to_remove.add("start_google_auth")
-        logger.info("OAuth 2.1 enabled: disabling start_google_auth tool")
+    return tool_names, scopes_by_name
 
-    # 3. Read-only mode filtering
-    if read_only_mode:
-        for tool_name in tool_names:
-            if tool_name in tools_to_remove:
-                continue
 
-            tool_obj = await server.get_tool(tool_name)
-            func_to_check = tool_obj
-            if hasattr(tool_obj, "fn"):
-                func_to_check = tool_obj.fn
+def _apply_filter(server, collected, enabled_tools, oauth21_enabled, read_only_mode):
+    """Compute the tools to remove from the collected data and remove them."""
+    tool_names, scopes_by_name = collected
+    allowed_scopes = frozenset(get_all_read_only_scopes()) if read_only_mode else None
+    tools_to_remove = set()
 
-            required_scopes = getattr(
-                func_to_check, "_required_google_scopes", []
-            )
+    for tool_name in tool_names:
+        # 1. Tier filtering
+        if enabled_tools is not None and tool_name not in enabled_tools:
+            tools_to_remove.add(tool_name)
+            continue
+
+        # 2. OAuth 2.1 filtering
+        if oauth21_enabled and tool_name == "start_google_auth":
+            tools_to_remove.add(tool_name)
+            logger.info("OAuth 2.1 enabled: disabling start_google_auth tool")
+            continue
+
+        # 3. Read-only mode filtering
+        if read_only_mode:
+            required_scopes = scopes_by_name.get(tool_name)
+            if required_scopes and not required_scopes <= allowed_scopes:
+                logger.info(
+                    f"Read-only mode: Disabling tool '{tool_name}' (requires write scopes: {sorted(required_scopes)})"
+                )
+                tools_to_remove.add(tool_name)
 
-            if required_scopes:
-                if not all(
-                    scope in allowed_scopes for scope in required_scopes
-                ):
-                    logger.info(
-                        f"Read-only mode: Disabling tool '{tool_name}' (requires write scopes: {required_scopes})"
-                    )
-                    tools_to_remove.add(tool_name)
-
-    for tool_name in tools_to_remove:
-        if hasattr(server, "local_provider"):
-            server.local_provider.remove_tool(tool_name)
-        else:
-            server.remove_tool(tool_name)
-        tools_removed += 1
+    _remove_tools(server, tools_to_remove)
+    tools_removed = len(tools_to_remove)
 
     if tools_removed > 0:
         enabled_count = len(enabled_tools) if enabled_tools is not None else "all"
-        mode = "Read-Only" if is_read_only_mode() else "Full"
+        mode = "Read-Only" if read_only_mode else "Full"
         logger.info(
             f"Tool filtering: removed {tools_removed} tools, {enabled_count} enabled. Mode: {mode}"
         )
+
+
+def _remove_tools(server, tool_names: Set[str]):
+    """Remove tools from the server, using a bulk API when the provider has one."""
+    if not tool_names:
+        return
+
+    target = server.local_provider if hasattr(server, "local_provider") else server
+    remove_tools = getattr(target, "remove_tools", None)
+    if callable(remove_tools):
+        remove_tools(tool_names)
+        return
+
+    for tool_name in tool_names:
+        target.remove_tool(tool_name)
@@ -486,6 +486,8 @@ def handle_http_errors(
         # Propagate _required_google_scopes if present (for tool filtering)
         if hasattr(func, "_required_google_scopes"):
             wrapper._required_google_scopes = func._required_google_scopes
+        if hasattr(func, "_required_google_scopes_frozen"):
+            wrapper._required_google_scopes_frozen = func._required_google_scopes_frozen
 
         return wrapper
 
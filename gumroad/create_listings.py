@@ -14,138 +14,148 @@ Products created:
 """
 
 import asyncio
+import functools
+import importlib.resources
 import logging
-import os
+import urllib.parse
+from typing import NamedTuple, Optional
 
 import httpx
 
+from gumroad.gumroad_helpers import (
+    GUMROAD_API_BASE,
+    _fmt_price,
+    _get_access_token,
+    _retry_after_seconds,
+)
+
 logger = logging.getLogger(__name__)
 
-GUMROAD_API_BASE = "https://api.gumroad.com/v2"
+MAX_ATTEMPTS = 3
+BASE_RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 4.0
+# Only statuses where Gumroad did not process the request; a 502/504 may come
+# back after the product was already created, so retrying could duplicate it.
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+class Product(NamedTuple):
+    """A Gumroad listing backed by a PDF in the Drive 'products' folder."""
+
+    drive_file_id: str
+    name: str
+    price: int
+    url_slug: str
+    description_file: str
+
 
 # ---------------------------------------------------------------------------
 # Product definitions
 # Google Drive file IDs come from the 'products' folder
 # (folder ID: 1UJLPz5-xG-Es38rh1oJU68s9a3LOyGNE)
+# Listing descriptions live as HTML files in gumroad/descriptions/ and are
+# only read when a product is actually created.
 # ---------------------------------------------------------------------------
 PRODUCTS = [
-    {
-        "drive_file_id": "1Xy12--WrU3KX3nHurGJN6M99I4s0y0IC",
-        "name": "Is Homeownership Right for You? (Free Chapter 1)",
-        "price": 0,
-        "url_slug": "checklist-and-chill-chapter-1-free",
-        "description": """<h2>Your homebuying journey starts here — and it's completely free.</h2>
-
-<p>Chapter 1 of the <strong>Checklist & Chill Homebuyer Guide</strong> walks you through the very first question every aspiring homeowner faces: <em>Is now actually the right time for me to buy?</em></p>
-
-<p>Written in plain English — no jargon, no pressure — this chapter helps you cut through the noise and figure out where you really stand before you ever talk to a lender or tour a single home.</p>
-
-<h3>What's inside:</h3>
-<ul>
-  <li>The honest questions to ask yourself before starting the homebuying process</li>
-  <li>How to separate emotional readiness from financial readiness</li>
-  <li>A clear-eyed look at what the homebuying process actually involves (so nothing surprises you later)</li>
-  <li>How this guide is structured — and how to use it to build real confidence, one chapter at a time</li>
-</ul>
-
-<p>This is the foundation chapter. Everything that comes next — the money prep, the mortgage math, the house hunt — makes a lot more sense once you've worked through this first.</p>
-
-<p><strong>100% free. No catch.</strong> Just download, read at your own pace, and decide if homeownership is the next move for you.</p>
-
-<p><em>From Checklist & Chill — calm, practical homebuying guidance for real people.</em></p>""",
-    },
-    {
-        "drive_file_id": "1CYauIMAFsYuoyG4CxPuYnxSukZwroTCh",
-        "name": "Homeowner Readiness Checklist Pack",
-        "price": 0,
-        "url_slug": "homeowner-readiness-checklist-pack",
-        "description": """<h2>Stop guessing. Start knowing exactly where you stand.</h2>
-
-<p>The <strong>Homeowner Readiness Checklist Pack</strong> from Checklist & Chill is a practical, fillable PDF toolkit designed to help first-time homebuyers get organized, get clear, and move forward with confidence.</p>
-
-<p>This isn't a vague to-do list. Every worksheet targets a real sticking point in the homebuying process — the stuff that trips people up before they even get to the house-hunting stage.</p>
-
-<h3>What's included:</h3>
-<ul>
-  <li><strong>Cash to Close Snapshot</strong> — Map out exactly how much cash you need: down payment, closing costs, upfront expenses, and your post-move cushion</li>
-  <li><strong>DTI Cheat Sheet</strong> — Calculate your debt-to-income ratio and see how your current debts affect how much home you can qualify for</li>
-  <li><strong>Homeownership Readiness Checklist</strong> — A step-by-step checklist covering financial prep, credit, savings, and next steps</li>
-  <li><strong>Bonus reference materials</strong> — Key terms defined simply so you're never lost in a lender conversation</li>
-</ul>
-
-<h3>Perfect for you if:</h3>
-<ul>
-  <li>You're 6–18 months away from wanting to buy and want to get ahead of the prep</li>
-  <li>You're not sure how much you actually need saved (hint: it's more than just the down payment)</li>
-  <li>You want a clear picture of your financial position before talking to a lender</li>
-  <li>You're a visual person who thinks better when things are written down</li>
-</ul>
-
-<p>Works perfectly alongside the <em>Checklist & Chill Homebuyer Guide</em> — but the worksheets are useful on their own too.</p>
-
-<p><strong>Free to download. Yours to keep.</strong></p>
-
-<p><em>From Checklist & Chill — calm, practical homebuying guidance for real people.</em></p>""",
-    },
-    {
-        "drive_file_id": "11lbR9vGBoMPouEEWFmCLfsLOiK64mRzP",
-        "name": "Rent vs. Buy Snapshot",
-        "price": 0,
-        "url_slug": "rent-vs-buy-snapshot",
-        "description": """<h2>One page. One decision. Total clarity.</h2>
-
-<p>The <strong>Rent vs. Buy Snapshot</strong> is a clean, no-fluff one-page reference from Checklist & Chill that helps you quickly compare where you stand — financially and practically — on the rent vs. buy question.</p>
-
-<p>Because the real answer isn't "buying is always better" or "renting is throwing money away." The real answer depends on <em>your</em> numbers, <em>your</em> timeline, and <em>your</em> life — and this snapshot helps you see that clearly.</p>
-
-<h3>What it covers:</h3>
-<ul>
-  <li>The key financial factors that actually tip the scale toward buying vs. renting</li>
-  <li>The break-even framework — how long you'd need to stay to make buying worth it</li>
-  <li>Hidden costs of both renting and owning that most comparisons skip</li>
-  <li>A simple self-assessment so you can honestly evaluate your own situation</li>
-</ul>
-
-<h3>Use it to:</h3>
-<ul>
-  <li>Cut through the noise when family and friends all have different opinions</li>
-  <li>Ground a conversation with your partner about your actual options</li>
-  <li>Figure out if now is the right time — or if waiting makes more financial sense</li>
-</ul>
-
-<p>Quick to read. Easy to reference. Built for the early stage of the decision — before you're deep in mortgage math or house tours.</p>
-
-<p><strong>Free download. No email required.</strong></p>
-
-<p><em>From Checklist & Chill — calm, practical homebuying guidance for real people.</em></p>""",
-    },
+    Product(
+        drive_file_id="1Xy12--WrU3KX3nHurGJN6M99I4s0y0IC",
+        name="Is Homeownership Right for You? (Free Chapter 1)",
+        price=0,
+        url_slug="checklist-and-chill-chapter-1-free",
+        description_file="chapter1.html",
+    ),
+    Product(
+        drive_file_id="1CYauIMAFsYuoyG4CxPuYnxSukZwroTCh",
+        name="Homeowner Readiness Checklist Pack",
+        price=0,
+        url_slug="homeowner-readiness-checklist-pack",
+        description_file="readiness_pack.html",
+    ),
+    Product(
+        drive_file_id="11lbR9vGBoMPouEEWFmCLfsLOiK64mRzP",
+        name="Rent vs. Buy Snapshot",
+        price=0,
+        url_slug="rent-vs-buy-snapshot",
+        description_file="rent_vs_buy.html",
+    ),
 ]
 
 
-def _get_access_token() -> str:
-    token = os.environ.get("GUMROAD_ACCESS_TOKEN")
-    if not token:
-        raise ValueError(
-            "GUMROAD_ACCESS_TOKEN environment variable not set. "
-            "Get your token from https://app.gumroad.com/settings/advanced"
-        )
-    return token
+@functools.lru_cache(maxsize=None)
+def _load_description(name: str) -> str:
+    return (
+        importlib.resources.files("gumroad")
+        .joinpath("descriptions")
+        .joinpath(name)
+        .read_text(encoding="utf-8")
+        .rstrip("\n")
+    )
 
 
-async def create_or_update_product(client: httpx.AsyncClient, token: str, product: dict) -> dict:
+@functools.lru_cache(maxsize=None)
+def _encoded_body(product: Product) -> bytes:
+    """URL-encode a product's form fields once; the token is prepended per request."""
+    return urllib.parse.urlencode(
+        {
+            "name": product.name,
+            "price": str(product.price),
+            "description": _load_description(product.description_file),
+            "url": product.url_slug,
+        }
+    ).encode()
+
+
+async def _post_with_retry(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """
+    POST with exponential backoff on 429, 503 and connect failures.
+
+    Read timeouts, 500s and gateway errors (502/504) are not retried: the
+    request may already have been processed, and repeating it could create a
+    duplicate listing.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        delay = min(BASE_RETRY_DELAY * (2**attempt), MAX_RETRY_DELAY)
+        try:
+            response = await client.post(url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            logger.warning(
+                "Connection to Gumroad failed on attempt %d: %s. Retrying in %.1fs…",
+                attempt + 1,
+                e,
+                delay,
+            )
+        else:
+            if (
+                response.status_code not in RETRYABLE_STATUS_CODES
+                or attempt == MAX_ATTEMPTS - 1
+            ):
+                return response
+            if "Retry-After" in response.headers:
+                delay = _retry_after_seconds(response, delay)
+            logger.warning(
+                "Gumroad returned HTTP %d on attempt %d. Retrying in %.1fs…",
+                response.status_code,
+                attempt + 1,
+                delay,
+            )
+        await asyncio.sleep(delay)
+
+
+async def create_or_update_product(client: httpx.AsyncClient, token: str, product: Product) -> dict:
     """Create a product on Gumroad. Returns the created product dict."""
-    form_data = {
-        "access_token": token,
-        "name": product["name"],
-        "price": str(product["price"]),
-        "description": product["description"],
-        "url": product["url_slug"],
-    }
-
-    response = await client.post(
+    body = (
+        urllib.parse.urlencode({"access_token": token}).encode()
+        + b"&"
+        + _encoded_body(product)
+    )
+
+    response = await _post_with_retry(
+        client,
         f"{GUMROAD_API_BASE}/products",
-        data=form_data,
-        timeout=30,
+        content=body,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
     )
     response.raise_for_status()
     data = response.json()
@@ -162,21 +172,37 @@ async def main():
 
     logger.info("Creating %d Gumroad product listings for Checklist & Chill…", len(PRODUCTS))
 
-    async with httpx.AsyncClient() as client:
-        for product in PRODUCTS:
-            logger.info("Creating: %s", product["name"])
-            try:
-                result = await create_or_update_product(client, token, product)
-                price_display = "Free" if result.get("price", 0) == 0 else f"${result['price'] / 100:.2f}"
-                logger.info(
-                    "  ✓ Created | ID: %s | Price: %s | URL: %s",
-                    result.get("id"),
-                    price_display,
-                    result.get("short_url", result.get("url", "N/A")),
-                )
-            except Exception as e:
-                logger.error("  ✗ Failed to create '%s': %s", product["name"], e)
+    for product in PRODUCTS:
+        logger.info("Creating: %s", product.name)
+
+    limits = httpx.Limits(
+        max_connections=len(PRODUCTS),
+        max_keepalive_connections=len(PRODUCTS),
+        keepalive_expiry=30.0,
+    )
+    timeout = httpx.Timeout(30.0, connect=5.0)
+    async with httpx.AsyncClient(http2=True, timeout=timeout, limits=limits) as client:
+        results = await asyncio.gather(
+            *(create_or_update_product(client, token, p) for p in PRODUCTS),
+            return_exceptions=True,
+        )
+
+    unexpected: Optional[BaseException] = None
+    for product, result in zip(PRODUCTS, results):
+        if isinstance(result, BaseException):
+            logger.error("  ✗ Failed to create '%s': %s", product.name, result)
+            if unexpected is None and not isinstance(result, (httpx.HTTPError, RuntimeError)):
+                unexpected = result
+            continue
+        logger.info(
+            "  ✓ Created | ID: %s | Price: %s | URL: %s",
+            result.get("id"),
+            _fmt_price(result.get("price", 0)),
+            result.get("short_url") or result.get("url") or "N/A",
+        )
 
+    if unexpected is not None:
+        raise unexpected
     logger.info("Done.")
 
 
@@ -0,0 +1,40 @@
+"""
+Gumroad Helper Functions
+
+Shared utilities for the Gumroad MCP tools and the listings creator script.
+"""
+
+import functools
+import os
+
+import httpx
+
+GUMROAD_API_BASE = "https://api.gumroad.com/v2"
+# Upper bound on how long a Retry-After header can make us wait
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+@functools.lru_cache(maxsize=1)
+def _get_access_token() -> str:
+    # Only a successful lookup is cached; a missing token raises on every call.
+    token = os.environ.get("GUMROAD_ACCESS_TOKEN")
+    if not token:
+        raise ValueError(
+            "GUMROAD_ACCESS_TOKEN environment variable not set. "
+            "Get your token from https://app.gumroad.com/settings/advanced"
+        )
+    return token
+
+
+def _fmt_price(cents: int) -> str:
+    """Format a Gumroad price in cents for display, e.g. ``$5.00`` or ``Free``."""
+    return f"${cents / 100:.2f}" if cents else "Free"
+
+
+def _retry_after_seconds(response: httpx.Response, default: float) -> float:
+    """Seconds to wait from ``Retry-After``, clamped to ``[0, MAX_RETRY_AFTER_SECONDS]``."""
+    try:
+        delay = float(response.headers.get("Retry-After", default))
+    except ValueError:
+        delay = default
+    return min(max(delay, 0.0), MAX_RETRY_AFTER_SECONDS)
@@ -5,27 +5,217 @@ This module provides MCP tools for interacting with the Gumroad API
 to manage products in your Gumroad store.
 """
 
+import asyncio
 import logging
-import os
-from typing import Optional
+import time
+from typing import Dict, Optional, Tuple
 
 import httpx
+import orjson
 
 from core.server import server
+from gumroad.gumroad_helpers import (
+    GUMROAD_API_BASE,
+    _fmt_price,
+    _get_access_token,
+    _retry_after_seconds,
+)
 
 logger = logging.getLogger(__name__)
 
-GUMROAD_API_BASE = "https://api.gumroad.com/v2"
+HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=300,
+)
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+# Connection attempts retried by the transport; 429s are retried by _request
+HTTP_CONNECT_RETRIES = 3
 
+# Clients (and the cache refresh locks below) are bound to the event loop that
+# created them, so each running loop gets its own. Entries for closed loops are
+# pruned explicitly: a weak mapping would never release them, because a pooled
+# client holds references back to its loop.
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
 
-def _get_access_token() -> str:
-    token = os.environ.get("GUMROAD_ACCESS_TOKEN")
-    if not token:
-        raise ValueError(
-            "GUMROAD_ACCESS_TOKEN environment variable not set. "
-            "Please set it to your Gumroad API access token."
+
+def _prune_closed_loops(per_loop: dict) -> None:
+    """Drop the entries of ``per_loop`` whose event loop has been closed."""
+    for loop in list(per_loop):
+        if loop.is_closed():
+            per_loop.pop(loop, None)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Return the running loop's Gumroad client, creating it on first use.
+
+    Connections are pooled across tool calls so repeated calls skip the TCP and
+    TLS handshake, and the access token is sent as a default Authorization
+    header. Clients of other loops that are still running are left alone, so
+    their in-flight requests are never cut off; clients of closed loops are
+    dropped, since their loop can no longer drive ``aclose()``.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        _prune_closed_loops(_clients)
+        token = _get_access_token()
+        client = httpx.AsyncClient(
+            base_url=GUMROAD_API_BASE,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=HTTP_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(
+                retries=HTTP_CONNECT_RETRIES,
+                limits=HTTP_LIMITS,
+                http2=True,
+            ),
         )
-    return token
+        _clients[loop] = client
+    return client
+
+
+async def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request on the shared client, retrying once on HTTP 429.
+
+    Failed connection attempts are already retried by the client's transport;
+    a rate-limited request waits for Gumroad's ``Retry-After`` (capped by
+    ``_retry_after_seconds``) before the single retry.
+    """
+    client = _get_client()
+    response = await client.request(method, url, **kwargs)
+    if response.status_code != 429:
+        return response
+
+    delay = _retry_after_seconds(response, 1.0)
+    logger.warning(
+        "[gumroad] Rate limited on %s %s; retrying in %.1fs", method, url, delay
+    )
+    await asyncio.sleep(delay)
+    return await client.request(method, url, **kwargs)
+
+
+def _parse_response(response: httpx.Response) -> dict:
+    """
+    Decode a Gumroad API response.
+
+    Gumroad reports client errors as JSON with ``success: false`` and a
+    ``message``, so only server faults (or a non-JSON body) fall back to
+    httpx's status error.
+    """
+    if response.status_code >= 500:
+        response.raise_for_status()
+    try:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        response.raise_for_status()
+        raise
+
+    if not data.get("success"):
+        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+
+    return data
+
+
+# Output templates, filled via str.format_map
+_LIST_ITEM_FMT = (
+    "{i}. {name}\n"
+    "   ID: {id}\n"
+    "   Price: {price}\n"
+    "   URL: {url}\n"
+    "   Published: {published}\n"
+    "   Sales count: {sales_count}\n"
+    "   Sales revenue: ${revenue:.2f}\n"
+)
+_DETAIL_FMT = (
+    "Product Details:\n\n"
+    "Name: {name}\n"
+    "ID: {id}\n"
+    "Description: {description}\n"
+    "Price: {price}\n"
+    "Currency: {currency}\n"
+    "URL: {url}\n"
+    "Published: {published}\n"
+    "Customizable price: {customizable_price}\n"
+    "Sales count: {sales_count}\n"
+    "Sales revenue: ${revenue:.2f}\n"
+)
+_CREATE_FMT = (
+    "Product created successfully!\n\n"
+    "Name: {name}\n"
+    "ID: {id}\n"
+    "Price: {price}\n"
+    "URL: {url}\n"
+    "Published: {published}\n"
+)
+_UPDATE_FMT = (
+    "Product updated successfully!\n\n"
+    "Name: {name}\n"
+    "ID: {id}\n"
+    "Description: {description}\n"
+    "Price: {price}\n"
+    "URL: {url}\n"
+)
+
+# Read caches for list_products / get_product, keyed off time.monotonic().
+# Mutating tools invalidate the affected entries.
+LIST_CACHE_TTL = 60.0
+PRODUCT_CACHE_TTL = 10.0
+
+_list_cache: Optional[Tuple[float, str]] = None
+_product_cache: Dict[str, Tuple[float, str]] = {}
+# Bumped on every invalidation; a refill only stores its result if no
+# mutation happened while it was fetching.
+_cache_generation = 0
+
+# Only one coroutine refills an expired entry; concurrent callers wait for it.
+# Like the clients, each loop gets its own list lock and per-product locks.
+class _ProductLock:
+    """A product's refill lock, with a count of the coroutines holding or awaiting it."""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+_refresh_locks: Dict[
+    asyncio.AbstractEventLoop, Tuple[asyncio.Lock, Dict[str, _ProductLock]]
+] = {}
+
+
+def _get_refresh_locks() -> Tuple[asyncio.Lock, Dict[str, _ProductLock]]:
+    """Return the list refresh lock and per-product locks for the running loop."""
+    loop = asyncio.get_running_loop()
+    locks = _refresh_locks.get(loop)
+    if locks is None:
+        _prune_closed_loops(_refresh_locks)
+        locks = _refresh_locks[loop] = (asyncio.Lock(), {})
+    return locks
+
+
+def _cached_list() -> Optional[str]:
+    if _list_cache is not None and time.monotonic() - _list_cache[0] < LIST_CACHE_TTL:
+        return _list_cache[1]
+    return None
+
+
+def _cached_product(product_id: str) -> Optional[str]:
+    cached = _product_cache.get(product_id)
+    if cached is not None and time.monotonic() - cached[0] < PRODUCT_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _invalidate_cache(product_id: Optional[str] = None) -> None:
+    """Drop the cached product list and, if given, one cached product."""
+    global _list_cache, _cache_generation
+    _cache_generation += 1
+    _list_cache = None
+    if product_id is not None:
+        _product_cache.pop(product_id, None)
 
 
 @server.tool()
@@ -36,40 +226,66 @@ async def list_products() -> str:
     Returns:
         str: Formatted list of all products including name, ID, price, URL, and status.
     """
-    access_token = _get_access_token()
+    global _list_cache
+    cached = _cached_list()
+    if cached is None:
+        list_lock, _ = _get_refresh_locks()
+        async with list_lock:
+            cached = _cached_list()
+            if cached is None:
+                generation = _cache_generation
+                result = await _fetch_product_list()
+                if generation == _cache_generation:
+                    _list_cache = (time.monotonic(), result)
+                return result
+
+    logger.info("[list_products] Returning cached product list")
+    return cached
+
+
+async def _fetch_product_list() -> str:
     logger.info("[list_products] Fetching all Gumroad products")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{GUMROAD_API_BASE}/products",
-            params={"access_token": access_token},
-        )
-        response.raise_for_status()
-        data = response.json()
-
-    if not data.get("success"):
-        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+    response = await _request("GET", "/products")
+    data = _parse_response(response)
 
     products = data.get("products", [])
 
+    # Fetch any remaining pages concurrently over the shared client
+    total_pages = data.get("total_pages") or 1
+    if total_pages > 1:
+        page_responses = await asyncio.gather(
+            *(
+                _request("GET", "/products", params={"page": page})
+                for page in range(2, total_pages + 1)
+            )
+        )
+        for page_response in page_responses:
+            page_data = _parse_response(page_response)
+            products.extend(page_data.get("products", []))
+
     if not products:
         return "No products found in your Gumroad store."
 
-    result = f"Found {len(products)} product(s) in your Gumroad store:\n\n"
+    parts = [f"Found {len(products)} product(s) in your Gumroad store:\n"]
     for i, product in enumerate(products, 1):
-        price_cents = product.get("price", 0)
-        price_display = f"${price_cents / 100:.2f}" if price_cents else "Free"
-        result += f"{i}. {product.get('name', 'Untitled')}\n"
-        result += f"   ID: {product.get('id', 'N/A')}\n"
-        result += f"   Price: {price_display}\n"
-        result += f"   URL: {product.get('short_url', product.get('url', 'N/A'))}\n"
-        result += f"   Published: {product.get('published', False)}\n"
-        result += f"   Sales count: {product.get('sales_count', 0)}\n"
-        result += f"   Sales revenue: ${product.get('sales_usd_cents', 0) / 100:.2f}\n"
-        result += "\n"
-
-    logger.info(f"[list_products] Successfully retrieved {len(products)} products")
-    return result
+        parts.append(
+            _LIST_ITEM_FMT.format_map(
+                {
+                    "i": i,
+                    "name": product.get("name", "Untitled"),
+                    "id": product.get("id", "N/A"),
+                    "price": _fmt_price(product.get("price", 0)),
+                    "url": product.get("short_url") or product.get("url") or "N/A",
+                    "published": product.get("published", False),
+                    "sales_count": product.get("sales_count", 0),
+                    "revenue": product.get("sales_usd_cents", 0) / 100,
+                }
+            )
+        )
+
+    logger.info("[list_products] Successfully retrieved %d products", len(products))
+    return "\n".join(parts) + "\n"
 
 
 @server.tool()
@@ -83,40 +299,59 @@ async def get_product(product_id: str) -> str:
     Returns:
         str: Formatted product details.
     """
-    access_token = _get_access_token()
-    logger.info(f"[get_product] Fetching product: {product_id}")
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{GUMROAD_API_BASE}/products/{product_id}",
-            params={"access_token": access_token},
-        )
-        response.raise_for_status()
-        data = response.json()
-
-    if not data.get("success"):
-        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+    cached = _cached_product(product_id)
+    if cached is None:
+        _, product_locks = _get_refresh_locks()
+        entry = product_locks.get(product_id)
+        if entry is None:
+            entry = product_locks[product_id] = _ProductLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                cached = _cached_product(product_id)
+                if cached is None:
+                    generation = _cache_generation
+                    result = await _fetch_product(product_id)
+                    if generation == _cache_generation:
+                        _product_cache[product_id] = (time.monotonic(), result)
+                    return result
+        finally:
+            # Drop the lock only once nobody holds or awaits it, so a caller
+            # arriving while waiters remain still queues behind the same lock
+            entry.users -= 1
+            if not entry.users:
+                del product_locks[product_id]
+
+    logger.info("[get_product] Returning cached product: %s", product_id)
+    return cached
+
+
+async def _fetch_product(product_id: str) -> str:
+    logger.info("[get_product] Fetching product: %s", product_id)
+
+    response = await _request("GET", f"/products/{product_id}")
+    data = _parse_response(response)
 
     product = data.get("product", {})
-    price_cents = product.get("price", 0)
-    price_display = f"${price_cents / 100:.2f}" if price_cents else "Free"
-
-    result = f"Product Details:\n\n"
-    result += f"Name: {product.get('name', 'Untitled')}\n"
-    result += f"ID: {product.get('id', 'N/A')}\n"
-    result += f"Description: {product.get('description', 'No description')}\n"
-    result += f"Price: {price_display}\n"
-    result += f"Currency: {product.get('currency', 'usd')}\n"
-    result += f"URL: {product.get('short_url', product.get('url', 'N/A'))}\n"
-    result += f"Published: {product.get('published', False)}\n"
-    result += f"Customizable price: {product.get('customizable_price', False)}\n"
-    result += f"Sales count: {product.get('sales_count', 0)}\n"
-    result += f"Sales revenue: ${product.get('sales_usd_cents', 0) / 100:.2f}\n"
+    result = _DETAIL_FMT.format_map(
+        {
+            "name": product.get("name", "Untitled"),
+            "id": product.get("id", "N/A"),
+            "description": product.get("description", "No description"),
+            "price": _fmt_price(product.get("price", 0)),
+            "currency": product.get("currency", "usd"),
+            "url": product.get("short_url") or product.get("url") or "N/A",
+            "published": product.get("published", False),
+            "customizable_price": product.get("customizable_price", False),
+            "sales_count": product.get("sales_count", 0),
+            "revenue": product.get("sales_usd_cents", 0) / 100,
+        }
+    )
 
     if product.get("variants"):
         result += f"Variants: {len(product['variants'])}\n"
 
-    logger.info(f"[get_product] Successfully retrieved product: {product_id}")
+    logger.info("[get_product] Successfully retrieved product: %s", product_id)
     return result
 
 
@@ -139,42 +374,35 @@ async def create_product(
     Returns:
         str: Confirmation with the new product's details.
     """
-    access_token = _get_access_token()
-    logger.info(f"[create_product] Creating product: {name}")
+    logger.info("[create_product] Creating product: %s", name)
 
     form_data = {
-        "access_token": access_token,
         "name": name,
         "price": str(price),
+        **{k: v for k, v in (("description", description), ("url", url)) if v},
     }
-    if description:
-        form_data["description"] = description
-    if url:
-        form_data["url"] = url
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{GUMROAD_API_BASE}/products",
-            data=form_data,
-        )
-        response.raise_for_status()
-        data = response.json()
 
-    if not data.get("success"):
-        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+    response = await _request(
+        "POST",
+        "/products",
+        data=form_data,
+    )
+    data = _parse_response(response)
 
     product = data.get("product", {})
-    price_cents = product.get("price", 0)
-    price_display = f"${price_cents / 100:.2f}" if price_cents else "Free"
-
-    result = f"Product created successfully!\n\n"
-    result += f"Name: {product.get('name', name)}\n"
-    result += f"ID: {product.get('id', 'N/A')}\n"
-    result += f"Price: {price_display}\n"
-    result += f"URL: {product.get('short_url', product.get('url', 'N/A'))}\n"
-    result += f"Published: {product.get('published', False)}\n"
-
-    logger.info(f"[create_product] Successfully created product: {product.get('id')}")
+    result = _CREATE_FMT.format_map(
+        {
+            "name": product.get("name", name),
+            "id": product.get("id", "N/A"),
+            "price": _fmt_price(product.get("price", 0)),
+            "url": product.get("short_url") or product.get("url") or "N/A",
+            "published": product.get("published", False),
+        }
+    )
+
+    _invalidate_cache()
+
+    logger.info("[create_product] Successfully created product: %s", product.get("id"))
     return result
 
 
@@ -197,43 +425,42 @@ async def update_product(
     Returns:
         str: Confirmation with the updated product details.
     """
-    access_token = _get_access_token()
-    logger.info(f"[update_product] Updating product: {product_id}")
-
-    form_data = {"access_token": access_token}
-    if name is not None:
-        form_data["name"] = name
-    if description is not None:
-        form_data["description"] = description
-    if price is not None:
-        form_data["price"] = str(price)
-
-    if len(form_data) == 1:
-        return "No fields to update. Provide at least one of: name, description, or price."
+    logger.info("[update_product] Updating product: %s", product_id)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{GUMROAD_API_BASE}/products/{product_id}",
-            data=form_data,
+    form_data = {
+        k: v
+        for k, v in (
+            ("name", name),
+            ("description", description),
+            ("price", str(price) if price is not None else None),
         )
-        response.raise_for_status()
-        data = response.json()
-
-    if not data.get("success"):
-        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+        if v is not None
+    }
 
-    product = data.get("product", {})
-    price_cents = product.get("price", 0)
-    price_display = f"${price_cents / 100:.2f}" if price_cents else "Free"
+    if not form_data:
+        return "No fields to update. Provide at least one of: name, description, or price."
 
-    result = f"Product updated successfully!\n\n"
-    result += f"Name: {product.get('name', 'Untitled')}\n"
-    result += f"ID: {product.get('id', product_id)}\n"
-    result += f"Description: {product.get('description', 'No description')}\n"
-    result += f"Price: {price_display}\n"
-    result += f"URL: {product.get('short_url', product.get('url', 'N/A'))}\n"
+    response = await _request(
+        "PUT",
+        f"/products/{product_id}",
+        data=form_data,
+    )
+    data = _parse_response(response)
 
-    logger.info(f"[update_product] Successfully updated product: {product_id}")
+    product = data.get("product", {})
+    result = _UPDATE_FMT.format_map(
+        {
+            "name": product.get("name", "Untitled"),
+            "id": product.get("id", product_id),
+            "description": product.get("description", "No description"),
+            "price": _fmt_price(product.get("price", 0)),
+            "url": product.get("short_url") or product.get("url") or "N/A",
+        }
+    )
+
+    _invalidate_cache(product_id)
+
+    logger.info("[update_product] Successfully updated product: %s", product_id)
     return result
 
 
@@ -248,21 +475,21 @@ async def delete_product(product_id: str) -> str:
     Returns:
         str: Confirmation that the product was deleted.
     """
-    access_token = _get_access_token()
-    logger.info(f"[delete_product] Deleting product: {product_id}")
+    logger.info("[delete_product] Deleting product: %s", product_id)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{GUMROAD_API_BASE}/products/{product_id}",
-            params={"access_token": access_token},
-        )
-        response.raise_for_status()
-        data = response.json()
+    response = await _request("DELETE", f"/products/{product_id}")
 
-    if not data.get("success"):
-        raise Exception(f"Gumroad API error: {data.get('message', 'Unknown error')}")
+    # A 2xx status already confirms the delete, so the body is only read on failure
+    if response.status_code >= 400:
+        try:
+            message = orjson.loads(response.content).get("message", "Unknown error")
+        except orjson.JSONDecodeError:
+            message = f"HTTP {response.status_code}"
+        raise Exception(f"Gumroad API error: {message}")
+
+    _invalidate_cache(product_id)
 
     result = f"Product '{product_id}' has been successfully deleted."
 
-    logger.info(f"[delete_product] Successfully deleted product: {product_id}")
+    logger.info("[delete_product] Successfully deleted product: %s", product_id)
     return result